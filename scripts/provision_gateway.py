@@ -26,29 +26,50 @@ Usage:
 
 Requirements:
   pip install requests supabase python-dotenv
+  pip install orjson   # optional, faster JSON
+  pip install brotli   # optional, lets TTN send br-compressed responses
 """
 
 import argparse
+import functools
+import io
 import json
 import os
+import random
 import sys
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-try:
-    import requests
-except ImportError:
-    print("Missing 'requests' package. Install with: pip install requests")
-    sys.exit(1)
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass  # dotenv is optional
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    # orjson is optional — stdlib json gives identical output, just slower
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
+    def _dumps_line(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
 # =============================================================================
 # THE TWO TRUTHS - Do not change without understanding the architecture
 # =============================================================================
@@ -64,6 +85,10 @@ NAM1_HOST = "nam1.cloud.thethings.network"                   # Gateway server ad
 DEFAULT_FREQUENCY_PLAN = "US_902_928_FSB_2"  # US 915 MHz, FSB2
 SCRIPT_VERSION = "fg-provision-gateway-v1.0-20260211"
 
+# FrostGuard DB credentials — read once, after load_dotenv() above
+_SUPABASE_URL = os.getenv("SUPABASE_URL")
+_SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
 # =============================================================================
 # COLORS FOR TERMINAL OUTPUT
 # =============================================================================
@@ -77,35 +102,166 @@ class C:
     DIM = "\033[2m"
     RESET = "\033[0m"
 
-def banner():
-    print(f"""
+# No escape codes when output is piped/redirected or NO_COLOR is set. Must run
+# before the prefixes and banner below are built from C.
+if not sys.stdout.isatty() or os.getenv("NO_COLOR"):
+    for _name in ("GREEN", "RED", "YELLOW", "CYAN", "BOLD", "DIM", "RESET"):
+        setattr(C, _name, "")
+
+_BANNER = f"""
 {C.CYAN}{C.BOLD}╔══════════════════════════════════════════════════════╗
 ║         FrostGuard Gateway Provisioning              ║
 ║         {C.DIM}TTN Cross-Cluster • v1.0{C.RESET}{C.CYAN}{C.BOLD}                      ║
 ╚══════════════════════════════════════════════════════╝{C.RESET}
-""")
+
+"""
+
+def banner():
+    sys.stdout.write(_BANNER)
+
+# Per-thread console sink: concurrent provisioners buffer their output here
+# so each gateway's block is printed whole instead of interleaved.
+_tls = threading.local()
+
+def _out():
+    """Return the current thread's output buffer, or sys.stdout."""
+    return getattr(_tls, "out", None) or sys.stdout
+
+# Step line prefixes, built once instead of on every call
+_OK_PREFIX = f"  {C.GREEN}✓{C.RESET} {C.BOLD}"
+_FAIL_PREFIX = f"  {C.RED}✗{C.RESET} {C.BOLD}"
+_INFO_PREFIX = f"  {C.CYAN}→{C.RESET} {C.BOLD}"
+_WARN_PREFIX = f"  {C.YELLOW}⚠{C.RESET} {C.BOLD}"
+_STEP_SEP = f"{C.RESET}: "
 
 def step_ok(step: str, msg: str):
-    print(f"  {C.GREEN}✓{C.RESET} {C.BOLD}{step}{C.RESET}: {msg}")
+    _out().write(f"{_OK_PREFIX}{step}{_STEP_SEP}{msg}\n")
 
 def step_fail(step: str, msg: str):
-    print(f"  {C.RED}✗{C.RESET} {C.BOLD}{step}{C.RESET}: {msg}")
+    _out().write(f"{_FAIL_PREFIX}{step}{_STEP_SEP}{msg}\n")
 
 def step_info(step: str, msg: str):
-    print(f"  {C.CYAN}→{C.RESET} {C.BOLD}{step}{C.RESET}: {msg}")
+    _out().write(f"{_INFO_PREFIX}{step}{_STEP_SEP}{msg}\n")
 
 def step_warn(step: str, msg: str):
-    print(f"  {C.YELLOW}⚠{C.RESET} {C.BOLD}{step}{C.RESET}: {msg}")
+    _out().write(f"{_WARN_PREFIX}{step}{_STEP_SEP}{msg}\n")
+
+
+def _poll_until(fn, *, ok_predicate, max_wait: float = 5.0, base: float = 0.1) -> dict:
+    """Call fn() with exponential backoff until ok_predicate(result) holds.
+
+    Returns as soon as the predicate is satisfied; once another sleep plus a
+    call as slow as the last one would overrun max_wait, the last result is
+    returned as-is so the caller can report it.
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        result = fn()
+        now = time.monotonic()
+        if ok_predicate(result):
+            return result
+        delay = base * 2 ** attempt
+        if now + delay + (now - started) > deadline:
+            return result
+        time.sleep(delay)
+        attempt += 1
+
+
+_HEX_DIGITS = b"0123456789ABCDEF"
+
+def _is_valid_eui(eui: str) -> bool:
+    """True if eui is exactly 16 upper-case hex digits (checked in one C-level pass)."""
+    return (
+        len(eui) == 16
+        and eui.isascii()
+        and not eui.encode("ascii").translate(None, _HEX_DIGITS)
+    )
+
+
+_EUI_SEPARATORS = {ord(":"): None, ord(" "): None, ord("-"): None}
+
+def _canon_eui(eui: str) -> str:
+    """Normalize an EUI as printed on a label (e.g. 00:80:00:...) to 16 upper-case hex chars.
+
+    Already-canonical input is returned after a single validation pass; otherwise
+    upper-casing and separator removal happen in two passes instead of three.
+    """
+    eui = eui.strip()
+    if _is_valid_eui(eui):
+        return eui
+    return eui.upper().translate(_EUI_SEPARATORS)
+
+
+_today_cache = ("", 0.0)  # (YYYYMMDD, epoch seconds of the next UTC midnight)
+
+def _cached_today() -> str:
+    """Return today's UTC date as YYYYMMDD, reformatted only after midnight UTC."""
+    global _today_cache
+    today, expires = _today_cache
+    now = time.time()
+    if now >= expires:
+        today = time.strftime("%Y%m%d", time.gmtime(now))
+        _today_cache = (today, now - now % 86400 + 86400)
+    return today
+
+
+def _write_secret(path: Path, key: str):
+    """Write a Basics Station key file, readable only by the owner (0600)."""
+    fd = os.open(str(path), os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+    try:
+        # The open() mode only applies on creation; tighten files left by older runs
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+        os.write(fd, b"Authorization: Bearer " + key.encode("ascii") + b"\r\n")
+    finally:
+        os.close(fd)
 
 
 # =============================================================================
 # TTN HTTP HELPER
 # =============================================================================
 
+# Endpoint templates — filled with a single ID via "%"
+_GATEWAY_URL = f"{IDENTITY_BASE_URL}/api/v3/gateways/%s"
+_GET_GATEWAY_URL = (
+    f"{_GATEWAY_URL}"
+    f"?field_mask=ids,name,frequency_plan_ids,gateway_server_address,"
+    f"antennas,status_public,location_public,enforce_duty_cycle,"
+    f"require_authenticated_connection"
+)
+# Existence checks only need these two fields (ids always come back)
+_CHECK_GATEWAY_URL = f"{_GATEWAY_URL}?field_mask=name,gateway_server_address"
+_PURGE_GATEWAY_URL = f"{_GATEWAY_URL}/purge"
+_GATEWAY_API_KEYS_URL = f"{_GATEWAY_URL}/api-keys"
+_USER_GATEWAYS_URL = f"{IDENTITY_BASE_URL}/api/v3/users/%s/gateways"
+_ORG_GATEWAYS_URL = f"{IDENTITY_BASE_URL}/api/v3/organizations/%s/gateways"
+_USER_URL = f"{IDENTITY_BASE_URL}/api/v3/users/%s"
+_ORG_URL = f"{IDENTITY_BASE_URL}/api/v3/organizations/%s"
+_GS_CONNECTION_STATS_URL = f"{REGIONAL_BASE_URL}/api/v3/gs/gateways/%s/connection/stats"
+
+# 429 and 503 mean the request was never processed, so even a create can be
+# re-sent; these POST retries are done by _request, not the session's policy
+_POST_RETRY_STATUSES = (429, 503)
+_POST_RETRIES = 4
+_MAX_RETRY_AFTER = 30.0
+
 class TTNClient:
     """HTTP client for TTN v3 REST API with cross-cluster support."""
 
     def __init__(self, api_key: str):
+        # Imported here rather than at module load so --help and argument
+        # errors don't pay for requests/urllib3
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+        except ImportError:
+            print("Missing 'requests' package. Install with: pip install requests")
+            sys.exit(1)
+
+        self._request_error = requests.exceptions.RequestException
         self.api_key = api_key
         self.session = requests.Session()
         self.session.headers.update({
@@ -115,80 +271,135 @@ class TTNClient:
             "User-Agent": SCRIPT_VERSION,
         })
 
+        # Keep-alive pool shared by every call to EU1/NAM1. POST is left out of
+        # the retry policy: re-sending a create (gateway, API key) after a 5xx
+        # or read error is not idempotent. See _request for POST on 429/503.
+        retry = Retry(
+            total=5,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,  # batch: --concurrency gateways × 4 step workers
+            pool_block=True,
+            max_retries=retry,
+        )
+        self.session.mount("https://", adapter)
+
     def _request(self, method: str, url: str, payload: dict = None) -> dict:
         """Make an HTTP request and return parsed JSON response."""
         try:
-            resp = self.session.request(method, url, json=payload, timeout=30)
-            body = resp.json() if resp.text else {}
+            for attempt in range(_POST_RETRIES + 1):
+                resp = self.session.request(method, url, json=payload, timeout=30)
+                if (method != "POST" or attempt == _POST_RETRIES
+                        or resp.status_code not in _POST_RETRY_STATUSES):
+                    break
+                time.sleep(self._retry_delay(resp, attempt))
+            raw = resp.content
+            body = _loads(raw) if raw else {}
             return {"status": resp.status_code, "body": body, "ok": resp.ok}
-        except requests.exceptions.RequestException as e:
+        except self._request_error as e:
             return {"status": 0, "body": {"error": str(e)}, "ok": False}
         except json.JSONDecodeError:
-            return {"status": resp.status_code, "body": {"raw": resp.text}, "ok": False}
+            return {"status": resp.status_code, "body": {"raw": raw.decode("utf-8", "replace")}, "ok": False}
+
+    @staticmethod
+    def _retry_delay(resp, attempt: int) -> float:
+        """Seconds to wait before re-sending a rate-limited POST, honouring Retry-After."""
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), _MAX_RETRY_AFTER)
+        return (2 ** attempt) * 0.25 + random.random() * 0.1
 
     # ── Identity Server (EU1) ────────────────────────────────────────────
 
     def get_gateway(self, gateway_id: str) -> dict:
         """Check if a gateway already exists on the Identity Server."""
-        url = (
-            f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}"
-            f"?field_mask=ids,name,frequency_plan_ids,gateway_server_address,"
-            f"antennas,status_public,location_public,enforce_duty_cycle,"
-            f"require_authenticated_connection"
-        )
-        return self._request("GET", url)
+        return self._request("GET", _GET_GATEWAY_URL % gateway_id)
+
+    def check_gateway(self, gateway_id: str) -> dict:
+        """Lightweight existence check — returns only ids, name and gateway_server_address."""
+        return self._request("GET", _CHECK_GATEWAY_URL % gateway_id)
 
     def register_gateway_for_user(self, user_id: str, gateway: dict) -> dict:
         """Register a gateway under a user on the Identity Server (EU1)."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/users/{user_id}/gateways"
-        return self._request("POST", url, {"gateway": gateway})
+        return self._request("POST", _USER_GATEWAYS_URL % user_id, {"gateway": gateway})
 
     def register_gateway_for_org(self, org_id: str, gateway: dict) -> dict:
         """Register a gateway under a TTN organization on the Identity Server (EU1)."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/organizations/{org_id}/gateways"
-        return self._request("POST", url, {"gateway": gateway})
+        return self._request("POST", _ORG_GATEWAYS_URL % org_id, {"gateway": gateway})
 
     def update_gateway(self, gateway_id: str, gateway: dict, field_mask: list) -> dict:
         """Update gateway fields on the Identity Server."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}"
         payload = {
             "gateway": {**gateway, "ids": {"gateway_id": gateway_id}},
             "field_mask": {"paths": field_mask},
         }
-        return self._request("PUT", url, payload)
+        return self._request("PUT", _GATEWAY_URL % gateway_id, payload)
+
+    def get_owner(self, owner_type: str, owner_id: str) -> dict:
+        """Look up the TTN user or organization a gateway will be registered under."""
+        url = _ORG_URL if owner_type == "org" else _USER_URL
+        return self._request("GET", url % owner_id)
 
     def delete_gateway(self, gateway_id: str) -> dict:
         """Delete a gateway from the Identity Server."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}"
-        return self._request("DELETE", url)
+        return self._request("DELETE", _GATEWAY_URL % gateway_id)
 
     def purge_gateway(self, gateway_id: str) -> dict:
         """Hard-delete (purge) a gateway from the Identity Server."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}/purge"
-        return self._request("DELETE", url)
+        return self._request("DELETE", _PURGE_GATEWAY_URL % gateway_id)
 
     # ── Gateway API Keys ─────────────────────────────────────────────────
 
     def create_gateway_api_key(self, gateway_id: str, name: str, rights: list) -> dict:
         """Create an API key for a gateway (used for LNS/CUPS connection)."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}/api-keys"
         payload = {
             "name": name,
             "rights": rights,
         }
-        return self._request("POST", url, payload)
+        return self._request("POST", _GATEWAY_API_KEYS_URL % gateway_id, payload)
 
     def list_gateway_api_keys(self, gateway_id: str) -> dict:
         """List existing API keys for a gateway."""
-        url = f"{IDENTITY_BASE_URL}/api/v3/gateways/{gateway_id}/api-keys"
-        return self._request("GET", url)
+        return self._request("GET", _GATEWAY_API_KEYS_URL % gateway_id)
 
     # ── Gateway Server (NAM1) ────────────────────────────────────────────
 
     def get_gateway_connection_stats(self, gateway_id: str) -> dict:
         """Get gateway connection stats from the Gateway Server (NAM1)."""
-        url = f"{REGIONAL_BASE_URL}/api/v3/gs/gateways/{gateway_id}/connection/stats"
-        return self._request("GET", url)
+        return self._request("GET", _GS_CONNECTION_STATS_URL % gateway_id)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(api_key: str) -> TTNClient:
+    """Return a shared TTNClient per API key so repeated calls reuse its connection pool.
+
+    The key stays in memory for the life of the process, which is fine for a
+    CLI run.
+    """
+    return TTNClient(api_key)
+
+
+@functools.lru_cache(maxsize=None)
+def _open_log(path: str) -> int:
+    """Open an NDJSON log for appending, once per path for the whole run.
+
+    Each record goes out in a single os.write on an O_APPEND descriptor, so
+    lines from concurrent provisioners do not interleave.
+    """
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_supabase(supabase_url: str, supabase_key: str):
+    """Create the Supabase client once per process (raises ImportError if missing)."""
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
 
 
 # =============================================================================
@@ -198,9 +409,14 @@ class TTNClient:
 class GatewayProvisioner:
     """Orchestrates the multi-step gateway provisioning process."""
 
-    def __init__(self, api_key: str):
-        self.client = TTNClient(api_key)
+    def __init__(self, api_key: str, log_file: str = None, client: TTNClient = None):
+        self.client = client or _get_client(api_key)
+        self.log_file = log_file
         self.results = []
+        self.pending_db_rows = []
+        self._deferred_summary = None
+        self.finished = 0
+        self._run_ts = None
 
     def _record(self, step: str, success: bool, msg: str, data: dict = None):
         self.results.append({
@@ -235,32 +451,60 @@ class GatewayProvisioner:
         output_dir: str = ".",
         fg_org_id: str = None,
         fg_site_id: str = None,
+        defer_db: bool = False,
     ) -> dict:
         """
         Full gateway provisioning flow.
         Returns dict with all provisioning results and generated credentials.
+
+        With defer_db=True the FrostGuard DB row is queued on
+        self.pending_db_rows instead of being written, and the summary and
+        log are held back until provision_many has recorded the upsert
+        result; None is returned.
         """
-        print(f"\n{C.BOLD}Provisioning gateway: {gateway_id}{C.RESET}")
-        print(f"{C.DIM}  EUI: {gateway_eui} | Owner: {owner_type}/{owner_id}{C.RESET}")
-        print(f"{C.DIM}  Frequency: {frequency_plan} | Region: NAM1{C.RESET}\n")
+        self.results = []
+        self._run_ts = datetime.now(timezone.utc).isoformat()
+        today_str = _cached_today()
+
+        out = _out()
+        print(f"\n{C.BOLD}Provisioning gateway: {gateway_id}{C.RESET}", file=out)
+        print(f"{C.DIM}  EUI: {gateway_eui} | Owner: {owner_type}/{owner_id}{C.RESET}", file=out)
+        print(f"{C.DIM}  Frequency: {frequency_plan} | Region: NAM1{C.RESET}\n", file=out)
 
         credentials = {}
 
         # ── Step 1: Check if gateway already exists ──────────────────────
         step_info("Step 1", "Checking if gateway already exists on EU1 Identity Server...")
-        existing = self.client.get_gateway(gateway_id)
+        existing = self.client.check_gateway(gateway_id)
+        exists, existing_status, existing_body = existing["ok"], existing["status"], existing["body"]
 
-        if existing["ok"]:
+        if exists:
             step_warn("Step 1", f"Gateway '{gateway_id}' already exists. Skipping registration.")
-            self._record("check_existing", True, "Gateway already registered", existing["body"])
-        elif existing["status"] == 404:
+            self._record("check_existing", True, "Gateway already registered", existing_body)
+        elif existing_status == 404:
             step_ok("Step 1", "Gateway not found — ready to register")
         else:
             # Could be permissions error, etc.
-            step_warn("Step 1", f"Unexpected response ({existing['status']}): {existing['body']}")
+            step_warn("Step 1", f"Unexpected response ({existing_status}): {existing_body}")
+
+        antennas = None
+        if latitude is not None and longitude is not None:
+            antennas = [{
+                "location": {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "altitude": altitude or 0,
+                    "source": "SOURCE_REGISTRY",
+                }
+            }]
+
+        # Fixes to an existing gateway record are collected here and sent as a
+        # single PUT once Step 3 has added its path.
+        pending_updates = {}
+        pending_paths = []
 
         # ── Step 2: Register gateway on EU1 Identity Server ──────────────
-        if not existing["ok"]:
+        if not exists:
             step_info("Step 2", f"Registering gateway under {owner_type} '{owner_id}' on EU1...")
 
             gateway_payload = {
@@ -276,76 +520,127 @@ class GatewayProvisioner:
                 "status_public": status_public,
                 "location_public": location_public,
             }
+            if antennas is not None:
+                gateway_payload["antennas"] = antennas  # Step 3 rides along
 
             if owner_type == "org":
                 result = self.client.register_gateway_for_org(owner_id, gateway_payload)
             else:
                 result = self.client.register_gateway_for_user(owner_id, gateway_payload)
+            reg_ok, reg_status, reg_body = result["ok"], result["status"], result["body"]
 
-            if result["ok"]:
+            if reg_ok:
                 self._record("register", True,
                              f"Gateway registered on EU1 → gateway_server_address: {NAM1_HOST}",
-                             result["body"])
+                             reg_body)
             else:
                 self._record("register", False,
-                             f"Registration failed ({result['status']}): {json.dumps(result['body'], indent=2)}")
-                return self._summary(gateway_id, credentials)
+                             f"Registration failed ({reg_status}): {json.dumps(reg_body, indent=2)}")
+                return self._summary(gateway_id, credentials, defer=defer_db)
         else:
             # Gateway exists — verify the gateway_server_address points to NAM1
-            gw_data = existing["body"]
-            gw_server = gw_data.get("gateway_server_address", "")
+            gw_server = existing_body.get("gateway_server_address", "")
             if gw_server != NAM1_HOST:
                 step_warn("Step 2", f"gateway_server_address is '{gw_server}', updating to '{NAM1_HOST}'...")
-                update_result = self.client.update_gateway(
-                    gateway_id,
-                    {"gateway_server_address": NAM1_HOST},
-                    ["gateway_server_address"],
-                )
-                if update_result["ok"]:
-                    self._record("update_server_address", True,
-                                 f"Updated gateway_server_address → {NAM1_HOST}")
-                else:
-                    self._record("update_server_address", False,
-                                 f"Failed to update: {update_result['body']}")
+                pending_updates["gateway_server_address"] = NAM1_HOST
+                pending_paths.append("gateway_server_address")
             else:
                 step_ok("Step 2", f"gateway_server_address already correct: {NAM1_HOST}")
 
         # ── Step 3: Set antenna location (optional) ──────────────────────
-        if latitude is not None and longitude is not None:
-            step_info("Step 3", "Setting antenna location...")
-            location_payload = {
-                "antennas": [{
-                    "location": {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "altitude": altitude or 0,
-                        "source": "SOURCE_REGISTRY",
-                    }
-                }]
-            }
-            loc_result = self.client.update_gateway(
-                gateway_id, location_payload, ["antennas"]
-            )
-            if loc_result["ok"]:
-                self._record("set_location", True,
-                             f"Location set: {latitude}, {longitude}, alt {altitude or 0}m")
-            else:
-                self._record("set_location", False,
-                             f"Failed: {loc_result['body']}")
-        else:
+        location_msg = f"Location set: {latitude}, {longitude}, alt {altitude or 0}m"
+        if antennas is None:
             step_info("Step 3", "No location provided — skipping")
+        elif not exists:
+            self._record("set_location", True, f"{location_msg} (with registration)")
+        else:
+            step_info("Step 3", "Setting antenna location...")
+            pending_updates["antennas"] = antennas
+            pending_paths.append("antennas")
+
+        if pending_paths:
+            update_result = self.client.update_gateway(gateway_id, pending_updates, pending_paths)
+            update_ok, update_body = update_result["ok"], update_result["body"]
+            if "gateway_server_address" in pending_updates:
+                if update_ok:
+                    self._record("update_server_address", True,
+                                 f"Updated gateway_server_address → {NAM1_HOST}")
+                else:
+                    self._record("update_server_address", False,
+                                 f"Failed to update: {update_body}")
+            if "antennas" in pending_updates:
+                if update_ok:
+                    self._record("set_location", True, location_msg)
+                else:
+                    self._record("set_location", False,
+                                 f"Failed: {update_body}")
+
+        # ── Steps 4–7 are independent once the gateway exists ───────────
+        # Dispatch the remote calls together, then report in step order so
+        # the output reads the same as a sequential run.
+        cups_rights = [
+            "RIGHT_GATEWAY_INFO",
+            "RIGHT_GATEWAY_SETTINGS_BASIC",
+            "RIGHT_GATEWAY_READ_SECRETS",
+        ]
+        lns_future = cups_future = db_future = None
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            if generate_lns_key:
+                step_info("Step 4", "Creating LNS API key (RIGHT_GATEWAY_LINK)...")
+                lns_future = pool.submit(
+                    self.client.create_gateway_api_key,
+                    gateway_id,
+                    f"FrostGuard LNS Key - {today_str}",
+                    ["RIGHT_GATEWAY_LINK"],
+                )
 
-        # ── Step 4: Create LNS API Key ───────────────────────────────────
-        if generate_lns_key:
-            step_info("Step 4", "Creating LNS API key (RIGHT_GATEWAY_LINK)...")
-            lns_result = self.client.create_gateway_api_key(
-                gateway_id,
-                f"FrostGuard LNS Key - {datetime.now(timezone.utc).strftime('%Y%m%d')}",
-                ["RIGHT_GATEWAY_LINK"],
-            )
-            if lns_result["ok"]:
-                lns_key = lns_result["body"].get("key", "")
-                lns_key_id = lns_result["body"].get("id", "")
+            if generate_cups_key:
+                step_info("Step 5", "Creating CUPS API key...")
+                cups_future = pool.submit(
+                    self.client.create_gateway_api_key,
+                    gateway_id,
+                    f"FrostGuard CUPS Key - {today_str}",
+                    cups_rights,
+                )
+            else:
+                step_info("Step 5", "CUPS key generation skipped (use --cups to enable)")
+
+            step_info("Step 6", "Checking gateway status on NAM1 Gateway Server...")
+            stats_future = pool.submit(self._fetch_nam1_stats, gateway_id)
+
+            if fg_org_id and defer_db:
+                step_info("Step 7", "Queued gateway config for batch DB upsert")
+                self.pending_db_rows.append(self._gateway_row(
+                    gateway_id=gateway_id,
+                    gateway_eui=gateway_eui,
+                    name=name,
+                    fg_org_id=fg_org_id,
+                    fg_site_id=fg_site_id,
+                    frequency_plan=frequency_plan,
+                    registered_at=self._run_ts,
+                ))
+            elif fg_org_id:
+                step_info("Step 7", "Storing gateway config in FrostGuard database...")
+                db_future = pool.submit(
+                    self._store_in_supabase,
+                    gateway_id=gateway_id,
+                    gateway_eui=gateway_eui,
+                    name=name,
+                    fg_org_id=fg_org_id,
+                    fg_site_id=fg_site_id,
+                    frequency_plan=frequency_plan,
+                    registered_at=self._run_ts,
+                )
+            else:
+                step_info("Step 7", "No FrostGuard org_id provided — skipping DB storage")
+
+        # ── Step 4: LNS API Key ──────────────────────────────────────────
+        if lns_future is not None:
+            lns_result = lns_future.result()
+            lns_ok, lns_body = lns_result["ok"], lns_result["body"]
+            if lns_ok:
+                lns_key = lns_body.get("key", "")
+                lns_key_id = lns_body.get("id", "")
                 credentials["lns_key"] = lns_key
                 credentials["lns_key_id"] = lns_key_id
                 self._record("create_lns_key", True,
@@ -353,29 +648,20 @@ class GatewayProvisioner:
 
                 # Generate lns.key file for Basics Station
                 lns_key_path = Path(output_dir) / f"{gateway_id}_lns.key"
-                lns_key_path.write_text(f"Authorization: Bearer {lns_key}\r\n")
+                _write_secret(lns_key_path, lns_key)
                 step_ok("Step 4b", f"LNS key file written: {lns_key_path}")
                 credentials["lns_key_file"] = str(lns_key_path)
             else:
                 self._record("create_lns_key", False,
-                             f"Failed: {lns_result['body']}")
-
-        # ── Step 5: Create CUPS API Key (optional) ───────────────────────
-        if generate_cups_key:
-            step_info("Step 5", "Creating CUPS API key...")
-            cups_rights = [
-                "RIGHT_GATEWAY_INFO",
-                "RIGHT_GATEWAY_SETTINGS_BASIC",
-                "RIGHT_GATEWAY_READ_SECRETS",
-            ]
-            cups_result = self.client.create_gateway_api_key(
-                gateway_id,
-                f"FrostGuard CUPS Key - {datetime.now(timezone.utc).strftime('%Y%m%d')}",
-                cups_rights,
-            )
-            if cups_result["ok"]:
-                cups_key = cups_result["body"].get("key", "")
-                cups_key_id = cups_result["body"].get("id", "")
+                             f"Failed: {lns_body}")
+
+        # ── Step 5: CUPS API Key (optional) ──────────────────────────────
+        if cups_future is not None:
+            cups_result = cups_future.result()
+            cups_ok, cups_body = cups_result["ok"], cups_result["body"]
+            if cups_ok:
+                cups_key = cups_body.get("key", "")
+                cups_key_id = cups_body.get("id", "")
                 credentials["cups_key"] = cups_key
                 credentials["cups_key_id"] = cups_key_id
                 self._record("create_cups_key", True,
@@ -383,54 +669,161 @@ class GatewayProvisioner:
 
                 # Generate cups.key file
                 cups_key_path = Path(output_dir) / f"{gateway_id}_cups.key"
-                cups_key_path.write_text(f"Authorization: Bearer {cups_key}\r\n")
+                _write_secret(cups_key_path, cups_key)
                 step_ok("Step 5b", f"CUPS key file written: {cups_key_path}")
                 credentials["cups_key_file"] = str(cups_key_path)
             else:
                 self._record("create_cups_key", False,
-                             f"Failed: {cups_result['body']}")
-        else:
-            step_info("Step 5", "CUPS key generation skipped (use --cups to enable)")
+                             f"Failed: {cups_body}")
 
         # ── Step 6: Verify gateway is reachable on NAM1 ──────────────────
-        step_info("Step 6", "Checking gateway status on NAM1 Gateway Server...")
-        time.sleep(1)  # Brief pause for propagation
-        stats = self.client.get_gateway_connection_stats(gateway_id)
-        if stats["ok"]:
+        stats = stats_future.result()
+        stats_ok, stats_status, stats_body = stats["ok"], stats["status"], stats["body"]
+        if stats_ok:
             self._record("verify_nam1", True, "Gateway is connected on NAM1!")
-        elif stats["status"] == 404:
+        elif stats_status == 404:
             self._record("verify_nam1", True,
                          "Gateway registered but not yet connected (expected — connect your hardware)")
         else:
             self._record("verify_nam1", False,
-                         f"Could not verify on NAM1 ({stats['status']}): {stats['body']}")
+                         f"Could not verify on NAM1 ({stats_status}): {stats_body}")
 
         # ── Step 7: Store in FrostGuard DB (Supabase) ────────────────────
-        if fg_org_id:
-            step_info("Step 7", "Storing gateway config in FrostGuard database...")
-            db_result = self._store_in_supabase(
-                gateway_id=gateway_id,
-                gateway_eui=gateway_eui,
-                name=name,
-                fg_org_id=fg_org_id,
-                fg_site_id=fg_site_id,
-                frequency_plan=frequency_plan,
-            )
-            if db_result:
+        if db_future is not None:
+            db_ok, db_detail = db_future.result()
+            if db_ok:
                 self._record("store_db", True, "Gateway stored in FrostGuard DB")
             else:
-                self._record("store_db", False, "Failed to store in FrostGuard DB (check Supabase credentials)")
-        else:
-            step_info("Step 7", "No FrostGuard org_id provided — skipping DB storage")
+                self._record("store_db", False, f"Failed to store in FrostGuard DB: {db_detail}")
 
         # ── Step 8: Generate connection instructions ─────────────────────
         self._print_connection_info(gateway_id, credentials, frequency_plan)
 
-        return self._summary(gateway_id, credentials)
+        return self._summary(gateway_id, credentials, defer=defer_db)
+
+    def provision_many(self, specs: list, max_workers: int = 16) -> list:
+        """Provision several gateways concurrently, with one FrostGuard DB upsert for all.
+
+        Each spec is a dict of provision() keyword arguments. Up to max_workers
+        gateways are in flight at once, all sharing this provisioner's TTN
+        session. Each gateway's output is printed as one block when it
+        finishes, under a header with completion count, throughput and ETA.
+        Once the DB upsert is done, each gateway's store_db step is recorded
+        and its summary and log are written. Returns the per-gateway
+        provisioning logs in spec order (None for a gateway that raised).
 
-    def _store_in_supabase(self, **kwargs) -> bool:
+        On Ctrl-C, gateways not yet started are cancelled. The ones already
+        in flight finish, and are reported, upserted and logged like the
+        rest, so TTN and the FrostGuard DB stay in step. Then
+        KeyboardInterrupt is re-raised; self.finished holds how many
+        gateways completed.
+        """
+        self.pending_db_rows = []
+        self.finished = 0
+        workers = [None] * len(specs)
+        start = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(specs))))
+        futures = {
+            pool.submit(self._provision_buffered, spec): i
+            for i, spec in enumerate(specs)
+        }
+        interrupted = False
+        try:
+            for future in as_completed(futures):
+                self._collect(future, futures[future], workers, start)
+        except KeyboardInterrupt:
+            interrupted = True
+            step_warn("Batch", "Interrupted — cancelling queued gateways, finishing those in flight...")
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future, i in futures.items():
+                if workers[i] is None and not future.cancelled():
+                    self._collect(future, i, workers, start)
+        else:
+            pool.shutdown()
+
+        outcomes = {}
+        if self.pending_db_rows:
+            print(f"\n{'='*60}")
+            step_info("DB", f"Upserting {len(self.pending_db_rows)} gateway row(s) to FrostGuard DB...")
+            outcomes = self._upsert_gateway_rows(self.pending_db_rows)
+            stored = sum(1 for error in outcomes.values() if not error)
+            if stored == len(outcomes):
+                step_ok("DB", f"Stored {stored} gateway(s) in FrostGuard DB")
+            else:
+                step_fail("DB", f"Stored {stored}/{len(outcomes)} gateway(s) in FrostGuard DB")
+            self.pending_db_rows = []
+
+        logs = [None] * len(specs)
+        for i, worker in enumerate(workers):
+            if worker is None or worker._deferred_summary is None:
+                continue
+            gateway_id, credentials = worker._deferred_summary
+            print(f"\n{C.BOLD}{gateway_id}{C.RESET}")
+            for row in worker.pending_db_rows:
+                error = outcomes[row["gateway_eui"]]
+                if error:
+                    worker._record("store_db", False, f"Failed to store in FrostGuard DB: {error}")
+                else:
+                    worker._record("store_db", True, "Gateway stored in FrostGuard DB")
+            logs[i] = worker._summary(gateway_id, credentials)
+
+        if interrupted:
+            raise KeyboardInterrupt
+        return logs
+
+    def _collect(self, future, index: int, workers: list, start: float):
+        """Print a finished gateway's buffered output under a progress header and keep its worker."""
+        output, worker = future.result()
+        self.finished += 1
+        total = len(workers)
+        elapsed = time.monotonic() - start
+        rate = self.finished / elapsed if elapsed else 0.0
+        eta = (total - self.finished) / rate if rate else 0.0
+        progress = f"Gateway {self.finished}/{total} · {rate:.2f} gw/s · ETA {eta:.0f}s"
+        sys.stdout.write(f"\n{'='*60}\n{progress}\n{'='*60}\n{output}")
+        workers[index] = worker
+        self.pending_db_rows.extend(worker.pending_db_rows)
+
+    def _provision_buffered(self, spec: dict) -> tuple:
+        """Provision one gateway on a worker thread, capturing its console output.
+
+        Returns ``(output, worker)``; the worker holds the queued DB rows and
+        the deferred summary.
+        """
+        worker = GatewayProvisioner(self.client.api_key, log_file=self.log_file, client=self.client)
+        buf = io.StringIO()
+        _tls.out = buf
+        try:
+            worker.provision(**spec, defer_db=True)
+        except Exception as e:
+            step_fail("Provision", f"{spec.get('gateway_id')}: {e}")
+            worker.pending_db_rows = []
+            worker._deferred_summary = None
+        finally:
+            _tls.out = None
+        return buf.getvalue(), worker
+
+    def _fetch_nam1_stats(self, gateway_id: str) -> dict:
+        """Fetch NAM1 connection stats.
+
+        One call is enough: a 404 (registered, not yet connected) is already an
+        expected answer, and 0/5xx have been retried by the session.
+        """
+        return self.client.get_gateway_connection_stats(gateway_id)
+
+    def _store_in_supabase(self, **kwargs) -> tuple:
         """Store gateway configuration in FrostGuard's Supabase database.
 
+        Returns ``(ok, detail)``. Runs on a worker thread, so it reports
+        problems through ``detail`` instead of printing.
+        """
+        error = self._upsert_gateway_rows([self._gateway_row(**kwargs)])[kwargs["gateway_eui"]]
+        return not error, error
+
+    @staticmethod
+    def _gateway_row(**kwargs) -> dict:
+        """Build a `gateways` table row.
+
         Maps to the `gateways` table schema:
           - organization_id  UUID NOT NULL  (FK → organizations)
           - site_id          UUID           (FK → sites, nullable)
@@ -442,50 +835,90 @@ class GatewayProvisioner:
           - ttn_registered_at TIMESTAMPTZ
           Unique constraint: (organization_id, gateway_eui)
         """
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        data = {
+            "organization_id": kwargs["fg_org_id"],
+            "gateway_eui": kwargs["gateway_eui"],
+            "name": kwargs["name"],
+            "ttn_gateway_id": kwargs["gateway_id"],
+            "status": "pending",
+            "ttn_registered_at": kwargs["registered_at"],
+            "description": (
+                f"Provisioned via {SCRIPT_VERSION} | "
+                f"freq: {kwargs['frequency_plan']} | cluster: nam1"
+            ),
+        }
 
-        if not supabase_url or not supabase_key:
-            step_warn("DB", "SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY not set")
-            return False
+        # Only include site_id if provided
+        if kwargs.get("fg_site_id"):
+            data["site_id"] = kwargs["fg_site_id"]
 
-        try:
-            from supabase import create_client
-            supabase = create_client(supabase_url, supabase_key)
-
-            data = {
-                "organization_id": kwargs["fg_org_id"],
-                "gateway_eui": kwargs["gateway_eui"],
-                "name": kwargs["name"],
-                "ttn_gateway_id": kwargs["gateway_id"],
-                "status": "pending",
-                "ttn_registered_at": datetime.now(timezone.utc).isoformat(),
-                "description": (
-                    f"Provisioned via {SCRIPT_VERSION} | "
-                    f"freq: {kwargs['frequency_plan']} | cluster: nam1"
-                ),
-            }
+        return data
 
-            # Only include site_id if provided
-            if kwargs.get("fg_site_id"):
-                data["site_id"] = kwargs["fg_site_id"]
+    def _upsert_gateway_rows(self, rows: list) -> dict:
+        """Upsert gateway rows in as few requests as possible, backing off on 429.
 
-            result = supabase.table("gateways").upsert(
-                data, on_conflict="organization_id,gateway_eui"
-            ).execute()
+        PostgREST requires every object in a bulk upsert to share the same
+        keys, so rows with and without site_id go out as separate requests.
+        If a bulk request is rejected as a whole, its rows are retried one at
+        a time so a single bad row doesn't lose the rest of the batch.
+        Returns ``{gateway_eui: error}``, with an empty error for stored rows.
+        """
+        euis = [row["gateway_eui"] for row in rows]
+        if not _SUPABASE_URL or not _SUPABASE_KEY:
+            return dict.fromkeys(euis, "SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY not set")
 
-            return bool(result.data)
+        try:
+            supabase = _get_supabase(_SUPABASE_URL, _SUPABASE_KEY)
         except ImportError:
-            step_warn("DB", "supabase package not installed. pip install supabase")
-            return False
+            return dict.fromkeys(euis, "supabase package not installed. pip install supabase")
         except Exception as e:
-            step_warn("DB", f"Supabase error: {e}")
-            return False
+            return dict.fromkeys(euis, f"Supabase error: {e}")
+
+        groups = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+
+        outcomes = {}
+        for group in groups.values():
+            try:
+                if self._upsert_with_backoff(supabase, group) == len(group):
+                    outcomes.update(dict.fromkeys((row["gateway_eui"] for row in group), ""))
+                    continue
+                error = "upsert returned no row"
+            except Exception as e:
+                error = f"Supabase error: {e}"
+            if len(group) == 1:
+                outcomes[group[0]["gateway_eui"]] = error
+                continue
+            for row in group:
+                try:
+                    stored = self._upsert_with_backoff(supabase, [row])
+                    outcomes[row["gateway_eui"]] = "" if stored else "upsert returned no row"
+                except Exception as e:
+                    outcomes[row["gateway_eui"]] = f"Supabase error: {e}"
+
+        return outcomes
+
+    @staticmethod
+    def _upsert_with_backoff(supabase, rows: list) -> int:
+        """Upsert rows in one request, retrying 429s with jittered backoff. Returns rows stored."""
+        from postgrest.exceptions import APIError
+
+        for attempt in range(5):
+            try:
+                result = supabase.table("gateways").upsert(
+                    rows, on_conflict="organization_id,gateway_eui"
+                ).execute()
+                return len(result.data or [])
+            except APIError as e:
+                if str(e.code) != "429" or attempt == 4:
+                    raise
+                time.sleep((2 ** attempt) * 0.25 + random.random() * 0.1)
 
     def _print_connection_info(self, gateway_id: str, credentials: dict, freq_plan: str):
         """Print gateway connection instructions for the user."""
         lns_key = credentials.get("lns_key", "N/A")
-        print(f"""
+        chunks = [f"""
 {C.CYAN}{C.BOLD}═══════════════════════════════════════════════════════
   Gateway Connection Information
 ═══════════════════════════════════════════════════════{C.RESET}
@@ -506,28 +939,40 @@ class GatewayProvisioner:
 {C.BOLD}── CUPS (if enabled) ──{C.RESET}
   Server URL:     https://{NAM1_HOST}:443
   Trust:          Let's Encrypt ISRG Root X1
-""")
+
+"""]
         if credentials.get("cups_key"):
             cups_key = credentials["cups_key"]
-            print(f"  CUPS Key:       {cups_key[:30]}...{cups_key[-10:] if len(cups_key) > 40 else cups_key}")
+            chunks.append(f"  CUPS Key:       {cups_key[:30]}...{cups_key[-10:] if len(cups_key) > 40 else cups_key}\n")
 
-        print(f"""
+        chunks.append(f"""
 {C.YELLOW}{C.BOLD}⚠ SAVE YOUR API KEYS NOW — they cannot be retrieved later.{C.RESET}
 {C.DIM}  Key files have been written to the output directory.{C.RESET}
+
 """)
+        # One write for the whole block
+        _out().write("".join(chunks))
+
+    def _summary(self, gateway_id: str, credentials: dict, defer: bool = False) -> Optional[dict]:
+        """Build and print a summary of all provisioning steps.
+
+        With defer=True nothing is printed or written yet; provision_many
+        finishes the summary once the batch DB upsert has been recorded.
+        """
+        if defer:
+            self._deferred_summary = (gateway_id, credentials)
+            return None
 
-    def _summary(self, gateway_id: str, credentials: dict) -> dict:
-        """Build and print a summary of all provisioning steps."""
         success_count = sum(1 for r in self.results if r["success"])
         total_count = len(self.results)
 
-        print(f"\n{C.BOLD}Summary: {success_count}/{total_count} steps succeeded{C.RESET}")
+        print(f"\n{C.BOLD}Summary: {success_count}/{total_count} steps succeeded{C.RESET}", file=_out())
 
         # Write full provisioning log
         log = {
             "gateway_id": gateway_id,
             "script_version": SCRIPT_VERSION,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._run_ts,
             "architecture": {
                 "identity_server": IDENTITY_BASE_URL,
                 "gateway_server": REGIONAL_BASE_URL,
@@ -541,9 +986,13 @@ class GatewayProvisioner:
             },
         }
 
-        log_path = Path(f"{gateway_id}_provision_log.json")
-        log_path.write_text(json.dumps(log, indent=2))
-        step_info("Log", f"Provisioning log saved: {log_path}")
+        if self.log_file:
+            os.write(_open_log(self.log_file), _dumps_line(log))
+            step_info("Log", f"Provisioning log appended: {self.log_file}")
+        else:
+            log_path = Path(f"{gateway_id}_provision_log.json")
+            log_path.write_bytes(_dumps(log))
+            step_info("Log", f"Provisioning log saved: {log_path}")
 
         return log
 
@@ -554,12 +1003,12 @@ class GatewayProvisioner:
 
 def deprovision_gateway(api_key: str, gateway_id: str, purge: bool = False):
     """Remove a gateway from TTN. Follows safe deletion order."""
-    client = TTNClient(api_key)
+    client = _get_client(api_key)
 
     print(f"\n{C.BOLD}{C.RED}Deprovisioning gateway: {gateway_id}{C.RESET}\n")
 
     # Step 1: Check it exists
-    check = client.get_gateway(gateway_id)
+    check = client.check_gateway(gateway_id)
     if not check["ok"]:
         step_fail("Check", f"Gateway not found: {check['body']}")
         return False
@@ -576,8 +1025,13 @@ def deprovision_gateway(api_key: str, gateway_id: str, purge: bool = False):
 
     # Step 3: Purge (hard delete, prevents orphan issues)
     if purge:
-        time.sleep(1)
-        purge_result = client.purge_gateway(gateway_id)
+        # The soft delete has to propagate before purge is accepted; until
+        # then purge answers 404. Any other failure is final (0 and 5xx have
+        # already been retried by the session).
+        purge_result = _poll_until(
+            lambda: client.purge_gateway(gateway_id),
+            ok_predicate=lambda r: r["status"] != 404,
+        )
         if purge_result["ok"] or purge_result["status"] == 200:
             step_ok("Purge", "Gateway hard-deleted (EUI released for reuse)")
         else:
@@ -585,7 +1039,7 @@ def deprovision_gateway(api_key: str, gateway_id: str, purge: bool = False):
             return False
 
     # Step 4: Verify
-    verify = client.get_gateway(gateway_id)
+    verify = client.check_gateway(gateway_id)
     if verify["status"] == 404:
         step_ok("Verify", "Gateway confirmed removed")
     else:
@@ -601,13 +1055,19 @@ def deprovision_gateway(api_key: str, gateway_id: str, purge: bool = False):
 
 def check_gateway_status(api_key: str, gateway_id: str):
     """Check gateway registration and connection status across both clusters."""
-    client = TTNClient(api_key)
+    client = _get_client(api_key)
 
     print(f"\n{C.BOLD}Gateway Status: {gateway_id}{C.RESET}\n")
 
+    # The three lookups are independent — issue them together, then render in order
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        gw_future = pool.submit(client.get_gateway, gateway_id)
+        stats_future = pool.submit(client.get_gateway_connection_stats, gateway_id)
+        keys_future = pool.submit(client.list_gateway_api_keys, gateway_id)
+
     # Identity Server (EU1)
     step_info("EU1", "Checking Identity Server registration...")
-    gw = client.get_gateway(gateway_id)
+    gw = gw_future.result()
     if gw["ok"]:
         data = gw["body"]
         step_ok("EU1", f"Registered — Name: {data.get('name', 'N/A')}")
@@ -624,7 +1084,7 @@ def check_gateway_status(api_key: str, gateway_id: str):
 
     # Gateway Server (NAM1)
     step_info("NAM1", "Checking Gateway Server connection...")
-    stats = client.get_gateway_connection_stats(gateway_id)
+    stats = stats_future.result()
     if stats["ok"]:
         data = stats["body"]
         step_ok("NAM1", "Gateway is CONNECTED")
@@ -639,7 +1099,7 @@ def check_gateway_status(api_key: str, gateway_id: str):
 
     # API Keys
     step_info("Keys", "Checking API keys...")
-    keys = client.list_gateway_api_keys(gateway_id)
+    keys = keys_future.result()
     if keys["ok"]:
         api_keys = keys["body"].get("api_keys", [])
         step_ok("Keys", f"{len(api_keys)} API key(s) found")
@@ -656,7 +1116,98 @@ def check_gateway_status(api_key: str, gateway_id: str):
 # INTERACTIVE MODE
 # =============================================================================
 
-def interactive_provision(api_key: str = None):
+_ENTER_GRACE = 0.4  # seconds to wait for an Enter typed after a y/n keypress
+
+def _getch() -> str:
+    """Read a single keypress from the terminal without waiting for Enter.
+
+    Typed-ahead input is discarded first, and an Enter that follows the key
+    within _ENTER_GRACE is swallowed, so a habitual "y⏎" doesn't spill into
+    the next prompt.
+    """
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+    if msvcrt:
+        while msvcrt.kbhit():
+            msvcrt.getwch()
+        ch = msvcrt.getwch()
+        if ch != "\r":
+            deadline = time.monotonic() + _ENTER_GRACE
+            while time.monotonic() < deadline:
+                if msvcrt.kbhit():
+                    while msvcrt.kbhit():
+                        msvcrt.getwch()
+                    break
+                time.sleep(0.01)
+        return ch
+
+    import select
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)  # cbreak, not raw, so Ctrl-C still interrupts
+        termios.tcflush(fd, termios.TCIFLUSH)
+        # os.read, not sys.stdin.read: the text layer would buffer the Enter
+        # where select() can't see it and input() would pick it up later
+        ch = os.read(fd, 1).decode("utf-8", "replace")
+        if ch not in ("\r", "\n") and select.select([fd], [], [], _ENTER_GRACE)[0]:
+            termios.tcflush(fd, termios.TCIFLUSH)
+        return ch
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+
+
+def _yn(prompt: str, default: bool = False) -> bool:
+    """Ask a y/n question, answered by a single keypress on a terminal.
+
+    Anything but y/n picks the default.
+    """
+    if sys.stdin.isatty():
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+        answer = _getch().lower()
+        print(answer if answer.isprintable() else "")
+    else:
+        answer = input(prompt).strip().lower()
+    if answer == "y":
+        return True
+    if answer == "n":
+        return False
+    return default
+
+
+def _prefetch(fn, *args) -> Future:
+    """Start a speculative lookup on a daemon thread.
+
+    Unlike executor workers, daemon threads are not joined at exit, so a
+    wizard abandoned mid-way doesn't wait on an in-flight TTN request.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _prefetched(future) -> Optional[dict]:
+    """Result of a background lookup if it is already in, else None (never blocks the wizard)."""
+    try:
+        return future.result(timeout=0.05)
+    except Exception:
+        return None
+
+
+def interactive_provision(api_key: str = None, log_file: str = None):
     """Walk the user through gateway provisioning interactively."""
     print(f"{C.BOLD}Interactive Gateway Provisioning{C.RESET}\n")
 
@@ -694,7 +1245,7 @@ def interactive_provision(api_key: str = None):
         if not gw_id:
             print(f"{C.RED}Gateway ID is required{C.RESET}")
             return
-        purge = input("Hard-delete / purge? This releases the EUI for reuse (y/N): ").strip().lower() == "y"
+        purge = _yn("Hard-delete / purge? This releases the EUI for reuse (y/N): ")
         confirm = input(f"\n{C.YELLOW}Are you sure you want to delete '{gw_id}'? (yes/no): {C.RESET}").strip().lower()
         if confirm == "yes":
             deprovision_gateway(api_key, gw_id, purge=purge)
@@ -703,15 +1254,20 @@ def interactive_provision(api_key: str = None):
         return
 
     # ── Provision flow ───────────────────────────────────────────────────
+    # Lookups run in the background while the user keeps typing; this also
+    # warms the TLS connections the provisioner will reuse.
+    client = _get_client(api_key)
+
     print(f"\n{C.BOLD}── Gateway Details ──{C.RESET}\n")
 
-    gateway_eui = input("Gateway EUI (16 hex chars, on the gateway label): ").strip().upper().replace(":", "").replace(" ", "")
-    if len(gateway_eui) != 16 or not all(c in "0123456789ABCDEF" for c in gateway_eui):
+    gateway_eui = _canon_eui(input("Gateway EUI (16 hex chars, on the gateway label): "))
+    if not _is_valid_eui(gateway_eui):
         print(f"{C.RED}EUI must be exactly 16 hex characters (e.g. 00800000A00009EF){C.RESET}")
         return
 
     default_id = f"fg-gw-{gateway_eui[-8:].lower()}"
     gateway_id = input(f"Gateway ID [{default_id}]: ").strip() or default_id
+    existing_future = _prefetch(client.check_gateway, gateway_id)
     name = input("Gateway name [FrostGuard Gateway]: ").strip() or "FrostGuard Gateway"
 
     print(f"\n{C.BOLD}── TTN Owner ──{C.RESET}")
@@ -723,6 +1279,7 @@ def interactive_provision(api_key: str = None):
     if not owner_id:
         print(f"{C.RED}Owner ID is required{C.RESET}")
         return
+    owner_future = _prefetch(client.get_owner, owner_type, owner_id)
 
     print(f"\n{C.BOLD}── Radio Configuration ──{C.RESET}\n")
     print(f"{C.DIM}  Common US plans: US_902_928_FSB_2 (most common), US_902_928_FSB_1{C.RESET}")
@@ -747,8 +1304,8 @@ def interactive_provision(api_key: str = None):
     print(f"\n{C.BOLD}── API Keys ──{C.RESET}\n")
     print(f"{C.DIM}  LNS key: Required for Basics Station gateways (most modern gateways){C.RESET}")
     print(f"{C.DIM}  CUPS key: For gateways that support auto-config via CUPS protocol{C.RESET}\n")
-    lns = input("Generate LNS key? (Y/n): ").strip().lower() != "n"
-    cups = input("Generate CUPS key? (y/N): ").strip().lower() == "y"
+    lns = _yn("Generate LNS key? (Y/n): ", default=True)
+    cups = _yn("Generate CUPS key? (y/N): ")
 
     print(f"\n{C.BOLD}── FrostGuard Database (optional) ──{C.RESET}\n")
     print(f"{C.DIM}  Store this gateway in FrostGuard's database for monitoring.{C.RESET}")
@@ -759,30 +1316,41 @@ def interactive_provision(api_key: str = None):
         fg_site_id = input("FrostGuard site_id (optional): ").strip() or None
 
     # ── Confirmation ─────────────────────────────────────────────────────
-    print(f"\n{C.CYAN}{'─' * 50}{C.RESET}")
-    print(f"{C.BOLD}  Review:{C.RESET}")
-    print(f"    Gateway EUI:   {gateway_eui}")
-    print(f"    Gateway ID:    {gateway_id}")
-    print(f"    Name:          {name}")
-    print(f"    Owner:         {owner_type}/{owner_id}")
-    print(f"    Freq Plan:     {freq_plan}")
-    print(f"    Identity:      EU1 (eu1.cloud.thethings.network)")
-    print(f"    Gateway Svr:   NAM1 (nam1.cloud.thethings.network)")
+    bold, reset, cyan, yellow = C.BOLD, C.RESET, C.CYAN, C.YELLOW
+    lines = [
+        f"\n{cyan}{'─' * 50}{reset}",
+        f"{bold}  Review:{reset}",
+        f"    Gateway EUI:   {gateway_eui}",
+        f"    Gateway ID:    {gateway_id}",
+        f"    Name:          {name}",
+        f"    Owner:         {owner_type}/{owner_id}",
+        f"    Freq Plan:     {freq_plan}",
+        "    Identity:      EU1 (eu1.cloud.thethings.network)",
+        "    Gateway Svr:   NAM1 (nam1.cloud.thethings.network)",
+    ]
     if latitude:
-        print(f"    Location:      {latitude}, {longitude}, {altitude}m")
-    print(f"    LNS Key:       {'Yes' if lns else 'No'}")
-    print(f"    CUPS Key:      {'Yes' if cups else 'No'}")
+        lines.append(f"    Location:      {latitude}, {longitude}, {altitude}m")
+    lines.append(f"    LNS Key:       {'Yes' if lns else 'No'}")
+    lines.append(f"    CUPS Key:      {'Yes' if cups else 'No'}")
     if fg_org_id:
-        print(f"    FG Org:        {fg_org_id}")
-    print(f"{C.CYAN}{'─' * 50}{C.RESET}")
-
-    confirm = input(f"\nProceed with provisioning? (Y/n): ").strip().lower()
-    if confirm == "n":
+        lines.append(f"    FG Org:        {fg_org_id}")
+    existing = _prefetched(existing_future)
+    if existing and existing["ok"]:
+        lines.append(f"    {yellow}Note: '{gateway_id}' already exists on EU1 — registration will be skipped{reset}")
+    owner = _prefetched(owner_future)
+    if owner and owner["status"] == 404:
+        lines.append(f"    {yellow}Warning: TTN {owner_type} '{owner_id}' was not found{reset}")
+    lines.append(f"{cyan}{'─' * 50}{reset}")
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+    if not _yn("\nProceed with provisioning? (Y/n): ", default=True):
         print("Cancelled.")
         return
 
     print()
-    provisioner = GatewayProvisioner(api_key)
+    print(f"{C.DIM}→ Contacting TTN ({IDENTITY_BASE_URL})…{C.RESET}", flush=True)
+    provisioner = GatewayProvisioner(api_key, log_file=log_file)
     provisioner.provision(
         gateway_id=gateway_id,
         gateway_eui=gateway_eui,
@@ -804,45 +1372,69 @@ def interactive_provision(api_key: str = None):
 # BATCH PROVISIONING FROM JSON
 # =============================================================================
 
-def batch_provision(api_key: str, json_path: str):
+def batch_provision(api_key: str, json_path: str, log_file: str = None, concurrency: int = 8):
     """Provision multiple gateways from a JSON config file."""
-    with open(json_path) as f:
-        config = json.load(f)
-
-    gateways = config.get("gateways", [config] if "gateway_eui" in config else [])
-
-    print(f"{C.BOLD}Batch provisioning {len(gateways)} gateway(s)...{C.RESET}\n")
-
-    for i, gw in enumerate(gateways, 1):
-        print(f"\n{'='*60}")
-        print(f"Gateway {i}/{len(gateways)}")
-        print(f"{'='*60}")
-
-        provisioner = GatewayProvisioner(api_key)
-        provisioner.provision(
-            gateway_id=gw.get("gateway_id", f"fg-gw-{gw['gateway_eui'][-8:].lower()}"),
-            gateway_eui=gw["gateway_eui"],
-            name=gw.get("name", "FrostGuard Gateway"),
-            owner_id=gw.get("owner_id", config.get("owner_id", "")),
-            owner_type=gw.get("owner_type", config.get("owner_type", "user")),
-            frequency_plan=gw.get("frequency_plan", DEFAULT_FREQUENCY_PLAN),
-            latitude=gw.get("latitude"),
-            longitude=gw.get("longitude"),
-            altitude=gw.get("altitude"),
-            generate_lns_key=gw.get("generate_lns_key", True),
-            generate_cups_key=gw.get("generate_cups_key", False),
-            fg_org_id=gw.get("fg_org_id"),
-            fg_site_id=gw.get("fg_site_id"),
-        )
+    config = _loads(Path(json_path).read_bytes())
+
+    # Per-gateway values fall back to these; config-level owner applies to all
+    defaults = {
+        "name": "FrostGuard Gateway",
+        "owner_id": config.get("owner_id", ""),
+        "owner_type": config.get("owner_type", "user"),
+        "frequency_plan": DEFAULT_FREQUENCY_PLAN,
+        "latitude": None,
+        "longitude": None,
+        "altitude": None,
+        "generate_lns_key": True,
+        "generate_cups_key": False,
+        "fg_org_id": None,
+        "fg_site_id": None,
+    }
+
+    specs = []
+    for gw in config.get("gateways", [config] if "gateway_eui" in config else []):
+        eui = _canon_eui(str(gw.get("gateway_eui", "")))
+        if not _is_valid_eui(eui):
+            step_fail("Config", f"Skipping gateway with invalid EUI {eui!r} (need 16 hex chars)")
+            continue
+        merged = {**defaults, **gw}
+        spec = {key: merged[key] for key in defaults}
+        spec["gateway_eui"] = eui
+        spec["gateway_id"] = gw.get("gateway_id", f"fg-gw-{eui[-8:].lower()}")
+        specs.append(spec)
+
+    print(f"{C.BOLD}Batch provisioning {len(specs)} gateway(s)...{C.RESET}\n")
+
+    # Gateway output is buffered until each one finishes — acknowledge right away
+    print(f"{C.DIM}→ Contacting TTN ({IDENTITY_BASE_URL}), up to {concurrency} gateway(s) at a time…{C.RESET}",
+          flush=True)
+    provisioner = GatewayProvisioner(api_key, log_file=log_file)
+    try:
+        provisioner.provision_many(specs, max_workers=concurrency)
+    except KeyboardInterrupt:
+        print(f"\n{C.YELLOW}{C.BOLD}Batch interrupted after {provisioner.finished}/{len(specs)} gateway(s);"
+              f" the rest were not provisioned.{C.RESET}")
+        sys.exit(130)
 
 
 # =============================================================================
 # MAIN
 # =============================================================================
 
-def main():
-    banner()
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
 
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser once per process (reused by repeated main() calls)."""
     parser = argparse.ArgumentParser(
         description="FrostGuard Gateway Provisioning for TTN",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -900,12 +1492,23 @@ Environment variables:
     parser.add_argument("--cups", action="store_true", help="Also generate CUPS API key")
     parser.add_argument("--purge", action="store_true", help="Hard-delete when deprovisioning")
     parser.add_argument("--output-dir", default=".", help="Directory for key files")
+    parser.add_argument("--concurrency", type=_positive_int, default=8, metavar="N",
+                        help="Gateways provisioned in parallel with --from-json (default: 8)")
+    parser.add_argument("--log-file", metavar="FILE",
+                        help="Append provisioning logs to FILE as NDJSON (default: one JSON file per gateway)")
     parser.add_argument("--api-key", help="TTN API key (or set TTN_API_KEY env var)")
 
     # FrostGuard DB
     parser.add_argument("--fg-org-id", help="FrostGuard organization ID (for DB storage)")
     parser.add_argument("--fg-site-id", help="FrostGuard site ID (optional)")
 
+    return parser
+
+
+def main():
+    banner()
+
+    parser = _build_parser()
     args = parser.parse_args()
 
     # Get API key (optional — interactive mode will prompt if missing)
@@ -914,12 +1517,13 @@ Environment variables:
     # Execute mode
     if args.interactive or (not args.from_json and not args.status and not args.deprovision and not args.gateway_eui):
         # Default to interactive mode when no args provided
-        interactive_provision(api_key)
+        interactive_provision(api_key, log_file=args.log_file)
     elif args.from_json:
         if not api_key:
             print(f"{C.RED}Error: TTN API key required. Use --api-key or set TTN_API_KEY env var.{C.RESET}")
             sys.exit(1)
-        batch_provision(api_key, args.from_json)
+        batch_provision(api_key, args.from_json, log_file=args.log_file,
+                        concurrency=args.concurrency)
     elif args.status:
         if not api_key:
             print(f"{C.RED}Error: TTN API key required. Use --api-key or set TTN_API_KEY env var.{C.RESET}")
@@ -937,15 +1541,18 @@ Environment variables:
             sys.exit(1)
         if not args.gateway_eui:
             parser.error("--gateway-eui is required (or use --interactive)")
+        gateway_eui = _canon_eui(args.gateway_eui)
+        if not _is_valid_eui(gateway_eui):
+            parser.error("--gateway-eui must be exactly 16 hex characters (e.g. 00800000A00009EF)")
         if not args.owner_id:
             parser.error("--owner-id is required")
 
-        gateway_id = args.gateway_id or f"fg-gw-{args.gateway_eui[-8:].lower()}"
+        gateway_id = args.gateway_id or f"fg-gw-{gateway_eui[-8:].lower()}"
 
-        provisioner = GatewayProvisioner(api_key)
+        provisioner = GatewayProvisioner(api_key, log_file=args.log_file)
         provisioner.provision(
             gateway_id=gateway_id,
-            gateway_eui=args.gateway_eui.upper(),
+            gateway_eui=gateway_eui,
             name=args.name,
             owner_id=args.owner_id,
             owner_type=args.owner_type,